@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
+import errno
+import functools
 import ipaddress
 import os
 import re
-import shutil
+import select
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from importlib import resources
+from operator import itemgetter
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
@@ -19,10 +23,44 @@ from .console import broadcast_to_consoles
 from .logging_utils import log_event
 from .network import LanConfiguration
 
+__all__ = [
+    "AutoInstallResult",
+    "InstallNetworkConfig",
+    "auto_install",
+    "build_install_network_config",
+    "build_install_network_config_with_defaults",
+    "load_install_network_config",
+]
+
 _AUTO_STATUS_FILENAME = "auto-install-status"
 _BLOCK_START = "# pre-nixos auto-install start"
 _BLOCK_END = "# pre-nixos auto-install end"
 _AUTO_INSTALL_MODULE = "./pre-nixos-auto-install-ip.nix"
+_BASELINE_CONFIG = "{\n}\n"
+_MOUNT_POLL_INITIAL_INTERVAL = 0.005
+_MOUNTINFO_PATH = "/proc/self/mountinfo"
+_COPY_FILE_RANGE_UNSUPPORTED = frozenset(
+    {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP}
+)
+
+# Lookup tables and patterns are built once at import time.
+_MOUNTINFO_ESCAPE = re.compile(r"\\([0-7]{3})")
+_NIX_STRING_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"'})
+_SHELL_INTERPOLATION = re.compile(r"\$\{([^}]+)\}")
+_NIX_INTERPOLATION_FULLMATCH = re.compile(
+    r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)+"
+).fullmatch
+_MANAGED_BLOCK_PATTERN = re.compile(
+    r"^[ \t]*(?:"
+    + re.escape(_BLOCK_START)
+    + r"[ \t]*$.*?(?:^[ \t]*"
+    + re.escape(_BLOCK_END)
+    + r"[ \t]*$|\Z)|"
+    + re.escape(_BLOCK_END)
+    + r"[ \t]*$)\n?",
+    re.DOTALL | re.MULTILINE,
+)
+_HARDWARE_SKIP_PATTERN = re.compile(r"fileSystems\.|swapDevices")
 
 
 @dataclass(frozen=True)
@@ -59,6 +97,32 @@ class InstallNetworkConfig:
         }
 
 
+def _write_status_file(status_path: Path, data: bytes) -> None:
+    """Atomically replace ``status_path`` with ``data``.
+
+    The bytes are written to a sibling temporary file that is renamed over
+    the status file, so readers never observe a partially written status.
+    """
+
+    tmp_path = status_path.with_name(status_path.name + ".tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, status_path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 def _record_result(
     status: str,
     *,
@@ -74,40 +138,41 @@ def _record_result(
     if reason:
         payload.setdefault("reason", reason)
 
+    status_path = status_dir / _AUTO_STATUS_FILENAME
+    write_error: Optional[str] = None
+    try:
+        status_dir.mkdir(parents=True, exist_ok=True)
+        # ``payload`` already includes the reason field; avoid duplicating it
+        # after it has been emitted explicitly.
+        items = [
+            (normalized_key, value)
+            for normalized_key, value in (
+                (key.upper(), value) for key, value in payload.items()
+            )
+            if normalized_key != "REASON"
+        ]
+        items.sort()
+        text = (
+            f"STATE={status}\n"
+            + (f"REASON={reason}\n" if reason else "")
+            + "".join(f"{key}={value}\n" for key, value in items)
+        )
+        _write_status_file(status_path, text.encode("utf-8"))
+    except OSError as error:
+        write_error = str(error)
+
+    fields: Dict[str, object] = {}
+    if write_error is not None:
+        fields["write_error"] = write_error
     log_event(
         "pre_nixos.install.result",
         status=status,
         reason=reason,
         details=payload,
+        status_path=status_path,
+        wrote_status=write_error is None,
+        **fields,
     )
-
-    try:
-        status_dir.mkdir(parents=True, exist_ok=True)
-        status_path = status_dir / _AUTO_STATUS_FILENAME
-        lines = [f"STATE={status}\n"]
-        if reason:
-            lines.append(f"REASON={reason}\n")
-        for key, value in sorted(payload.items()):
-            normalized_key = key.upper()
-            # ``payload`` already includes the reason field; avoid duplicating it
-            # after it has been emitted explicitly above.
-            if normalized_key == "REASON":
-                continue
-            lines.append(f"{normalized_key}={value}\n")
-        status_path.write_text("".join(lines), encoding="utf-8")
-        log_event(
-            "pre_nixos.install.status_written",
-            status_path=status_path,
-            status=status,
-        )
-    except OSError as error:
-        log_event(
-            "pre_nixos.install.status_write_failed",
-            error=str(error),
-            status=status,
-            status_dir=status_dir,
-        )
-
     return AutoInstallResult(status=status, reason=reason, details=payload)
 
 
@@ -182,6 +247,12 @@ def build_install_network_config_with_defaults(
     return build_install_network_config(address, resolved_netmask, resolved_gateway)
 
 
+def _unescape_mountinfo(match: re.Match[str]) -> str:
+    """Decode an octal escape (e.g. ``\\040``) from ``/proc/self/mountinfo``."""
+
+    return chr(int(match.group(1), 8))
+
+
 def _is_mount_ready(root_path: Path) -> bool:
     """Return ``True`` when ``root_path`` is an active mount point."""
 
@@ -195,18 +266,22 @@ def _is_mount_ready(root_path: Path) -> bool:
         return False
 
     try:
-        resolved = root_path.resolve(strict=False)
+        target = os.fspath(root_path.resolve(strict=False))
     except OSError:
         return False
 
+    # The kernel reports canonical mount points, so only the target needs
+    # resolving; entries are compared as strings after undoing octal escapes.
     try:
-        with open("/proc/self/mountinfo", "r", encoding="utf-8") as fp:
+        with open(_MOUNTINFO_PATH, "r", encoding="utf-8") as fp:
             for line in fp:
                 parts = line.split()
                 if len(parts) < 5:
                     continue
-                mount_point = Path(parts[4]).resolve(strict=False)
-                if mount_point == resolved:
+                mount_point = parts[4]
+                if "\\" in mount_point:
+                    mount_point = _MOUNTINFO_ESCAPE.sub(_unescape_mountinfo, mount_point)
+                if mount_point == target:
                     return True
     except OSError:
         return False
@@ -219,8 +294,33 @@ def _is_mount_ready(root_path: Path) -> bool:
     return False
 
 
+def _open_mount_watch() -> Optional[Tuple[int, Any]]:
+    """Return a descriptor and poller that wake on mount table changes.
+
+    The kernel flags ``/proc/self/mountinfo`` with ``POLLPRI`` whenever the
+    mount namespace changes.  ``None`` is returned when the file or
+    ``select.poll`` is unavailable so callers can fall back to sleeping.
+    """
+
+    if not hasattr(select, "poll"):
+        return None
+    try:
+        fd = os.open(_MOUNTINFO_PATH, os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return None
+    poller = select.poll()
+    poller.register(fd, select.POLLPRI | select.POLLERR)
+    return fd, poller
+
+
 def _wait_for_mount(root_path: Path, *, attempts: int = 30, delay: float = 1.0) -> bool:
-    """Poll ``root_path`` until it becomes a mount point."""
+    """Wait for ``root_path`` to become a mount point.
+
+    Between checks the wait blocks on mount table change notifications,
+    re-checking at least every configured interval.  Without notifications,
+    polling starts at a few milliseconds and backs off exponentially up to the
+    configured interval.  ``attempts * delay`` bounds the total wall-clock wait.
+    """
 
     exec_enabled = os.environ.get("PRE_NIXOS_EXEC") == "1"
     sleep_interval = delay if exec_enabled else min(delay, 0.1)
@@ -232,15 +332,32 @@ def _wait_for_mount(root_path: Path, *, attempts: int = 30, delay: float = 1.0)
         delay_seconds=delay,
     )
 
-    for attempt in range(1, attempts + 1):
-        if _is_mount_ready(root_path):
-            log_event(
-                "pre_nixos.install.wait_for_mount.ready",
-                root_path=root_path,
-                attempt=attempt,
-            )
-            return True
-        time.sleep(sleep_interval)
+    deadline = time.monotonic() + attempts * sleep_interval
+    interval = min(_MOUNT_POLL_INITIAL_INTERVAL, sleep_interval)
+    watch = _open_mount_watch()
+    attempt = 0
+    try:
+        while attempts > 0:
+            attempt += 1
+            if _is_mount_ready(root_path):
+                log_event(
+                    "pre_nixos.install.wait_for_mount.ready",
+                    root_path=root_path,
+                    attempt=attempt,
+                )
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if watch is not None:
+                timeout_ms = max(1, int(min(sleep_interval, remaining) * 1000))
+                watch[1].poll(timeout_ms)
+            else:
+                time.sleep(min(interval, remaining))
+                interval = min(interval * 2, sleep_interval)
+    finally:
+        if watch is not None:
+            os.close(watch[0])
 
     log_event(
         "pre_nixos.install.wait_for_mount.timeout",
@@ -254,22 +371,22 @@ def _wait_for_mount(root_path: Path, *, attempts: int = 30, delay: float = 1.0)
 def _escape_nix_string(value: str) -> str:
     """Return *value* escaped for inclusion inside a Nix string literal."""
 
-    return value.replace("\\", "\\\\").replace('"', '\\"')
+    return value.translate(_NIX_STRING_ESCAPES)
+
 
+def _escape_shell_interpolation(match: re.Match[str]) -> str:
+    """Escape a ``${...}`` occurrence unless it is a Nix attribute path."""
 
-_NIX_INTERPOLATION = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z0-9_]+)+$")
+    inner = match.group(1)
+    if _NIX_INTERPOLATION_FULLMATCH(inner):
+        return match.group(0)
+    return "''${" + inner + "}"
 
 
 def _escape_nix_indented_line(value: str) -> str:
     """Return *value* with Nix indented string escapes applied."""
 
-    def escape(match: re.Match[str]) -> str:
-        inner = match.group(1)
-        if _NIX_INTERPOLATION.fullmatch(inner):
-            return match.group(0)
-        return "''${" + inner + "}"
-
-    return re.sub(r"\$\{([^}]+)\}", escape, value)
+    return _SHELL_INTERPOLATION.sub(_escape_shell_interpolation, value)
 
 
 def _extract_label(extra_args: Iterable[str]) -> Optional[str]:
@@ -284,6 +401,68 @@ def _extract_label(extra_args: Iterable[str]) -> Optional[str]:
     return None
 
 
+def _select_storage_locator(
+    label: Optional[str], device: Optional[str]
+) -> Optional[Dict[str, str]]:
+    """Return the ``label``/``device`` attribute identifying a volume."""
+
+    if label:
+        return {"label": label}
+    if device:
+        return {"device": device}
+    return None
+
+
+def _collect_storage_content(
+    content: Any,
+    device: Optional[str],
+    filesystems: list[Dict[str, Any]],
+    swaps: list[Tuple[str, Dict[str, str]]],
+) -> None:
+    """Append the filesystem or swap described by ``content`` to the results.
+
+    ``device`` is the fallback block device path used when the content does
+    not carry a label.  Swaps are recorded as ``(sort_key, locator)`` pairs.
+    """
+
+    if not isinstance(content, dict):
+        return
+    ctype = content.get("type")
+    if ctype == "filesystem":
+        mountpoint = content.get("mountpoint")
+        if not isinstance(mountpoint, str) or not mountpoint:
+            return
+        extra_args = content.get("extraArgs") or []
+        label = _extract_label(extra_args)
+        fs_type = content.get("format")
+        if not isinstance(fs_type, str) or not fs_type:
+            return
+        options = content.get("mountOptions") or []
+        if not isinstance(options, list):
+            options = []
+        elif not all(isinstance(opt, str) and opt for opt in options):
+            options = [opt for opt in options if isinstance(opt, str) and opt]
+        locator = _select_storage_locator(label, device)
+        if not locator:
+            return
+        entry = {
+            "mountpoint": mountpoint,
+            "fsType": fs_type,
+            "options": options,
+            **locator,
+        }
+        permissions = content.get("mountpointPermissions")
+        if isinstance(permissions, int):
+            entry["mountpointPermissions"] = permissions
+        filesystems.append(entry)
+    elif ctype == "swap":
+        extra_args = content.get("extraArgs") or []
+        label = _extract_label(extra_args)
+        locator = _select_storage_locator(label, device)
+        if locator:
+            swaps.append((label or device or "", locator))
+
+
 def _collect_storage_definitions(
     storage_plan: Optional[Dict[str, Any]],
 ) -> Tuple[list[Dict[str, Any]], list[Dict[str, str]]]:
@@ -297,62 +476,9 @@ def _collect_storage_definitions(
         return [], []
 
     filesystems: list[Dict[str, Any]] = []
-    swaps: list[Dict[str, str]] = []
-
-    def select_locator(
-        context: Dict[str, str], label: Optional[str]
-    ) -> Optional[Dict[str, str]]:
-        kind = context.get("kind")
-        if label:
-            return {"label": label}
-        if kind == "lvm_lv":
-            vg = context.get("vg")
-            lv = context.get("lv")
-            if vg and lv:
-                return {"device": f"/dev/{vg}/{lv}"}
-        elif kind == "partition":
-            part = context.get("partition")
-            if part:
-                return {"device": f"/dev/{part}"}
-        return None
+    swaps: list[Tuple[str, Dict[str, str]]] = []
 
-    def handle_content(content: Any, context: Dict[str, str]) -> None:
-        if not isinstance(content, dict):
-            return
-        ctype = content.get("type")
-        if ctype == "filesystem":
-            mountpoint = content.get("mountpoint")
-            if not isinstance(mountpoint, str) or not mountpoint:
-                return
-            extra_args = content.get("extraArgs") or []
-            label = _extract_label(extra_args)
-            fs_type = content.get("format")
-            if not isinstance(fs_type, str) or not fs_type:
-                return
-            options = content.get("mountOptions") or []
-            if not isinstance(options, list):
-                options = []
-            locator = select_locator(context, label)
-            if not locator:
-                return
-            entry = {
-                "mountpoint": mountpoint,
-                "fsType": fs_type,
-                "options": [opt for opt in options if isinstance(opt, str) and opt],
-                **locator,
-            }
-            permissions = content.get("mountpointPermissions")
-            if isinstance(permissions, int):
-                entry["mountpointPermissions"] = permissions
-            filesystems.append(entry)
-        elif ctype == "swap":
-            extra_args = content.get("extraArgs") or []
-            label = _extract_label(extra_args)
-            locator = select_locator(context, label)
-            if locator:
-                swaps.append(locator)
-
-    for disk_name, disk in devices.get("disk", {}).items():
+    for disk in devices.get("disk", {}).values():
         partitions = (
             disk.get("content", {}).get("partitions", {})
             if isinstance(disk, dict)
@@ -360,23 +486,19 @@ def _collect_storage_definitions(
         )
         for part_name, part in partitions.items():
             content = part.get("content") if isinstance(part, dict) else None
-            handle_content(
-                content,
-                {"kind": "partition", "disk": disk_name, "partition": part_name},
-            )
+            device = f"/dev/{part_name}" if part_name else None
+            _collect_storage_content(content, device, filesystems, swaps)
 
     for vg_name, vg in devices.get("lvm_vg", {}).items():
         lvs = vg.get("lvs", {}) if isinstance(vg, dict) else {}
         for lv_name, lv in lvs.items():
             content = lv.get("content") if isinstance(lv, dict) else None
-            handle_content(
-                content,
-                {"kind": "lvm_lv", "vg": vg_name, "lv": lv_name},
-            )
+            device = f"/dev/{vg_name}/{lv_name}" if vg_name and lv_name else None
+            _collect_storage_content(content, device, filesystems, swaps)
 
-    filesystems.sort(key=lambda entry: entry["mountpoint"])
-    swaps.sort(key=lambda entry: entry.get("label") or entry.get("device") or "")
-    return filesystems, swaps
+    filesystems.sort(key=itemgetter("mountpoint"))
+    swaps.sort(key=itemgetter(0))
+    return filesystems, [locator for _, locator in swaps]
 
 
 def _format_nix_list(items: Iterable[str]) -> str:
@@ -431,8 +553,13 @@ def load_install_network_config(
     return None
 
 
-def _load_ip_announcement_script() -> list[str]:
-    """Return the shared LAN IP announcement script as a list of lines."""
+@functools.lru_cache(maxsize=1)
+def _load_ip_announcement_script() -> tuple[str, ...]:
+    """Return the shared LAN IP announcement script as a tuple of lines.
+
+    The script is packaged with ``pre_nixos`` and immutable for the lifetime
+    of the process, so the result is cached after the first lookup.
+    """
 
     try:
         script = resources.files(__package__).joinpath("scripts/announce-lan-ip.sh")
@@ -442,7 +569,7 @@ def _load_ip_announcement_script() -> list[str]:
             "Missing IP announcement helper packaged with pre_nixos"
         ) from error
     # Preserve interior blank lines while trimming trailing whitespace-only lines
-    return content.strip("\n").splitlines()
+    return tuple(content.strip("\n").splitlines())
 
 
 def _load_auto_install_module_template() -> str:
@@ -521,6 +648,87 @@ def _ensure_auto_install_import(lines: list[str]) -> list[str]:
     return lines[:insertion_point] + insertion_block + lines[insertion_point:]
 
 
+def _find_terminator_offset(text: str) -> Optional[int]:
+    """Return the offset of the last line of *text* consisting solely of ``}``."""
+
+    end = len(text)
+    while True:
+        brace = text.rfind("}", 0, end)
+        if brace < 0:
+            return None
+        line_start = text.rfind("\n", 0, brace) + 1
+        line_end = text.find("\n", brace)
+        if line_end < 0:
+            line_end = len(text)
+        if text[line_start:line_end].strip() == "}":
+            return line_start
+        end = line_start
+
+
+_AUTO_BLOCK_HEADER = "\n".join(
+    [
+        "  " + _BLOCK_START,
+        "  networking.firewall = {",
+        "    enable = true;",
+        "    allowPing = true;",
+        "    allowedTCPPorts = [ 22 ];",
+        "    allowedUDPPorts = [ ];",
+        "  };",
+        "",
+        "  networking.useDHCP = false;",
+        "  networking.useNetworkd = true;",
+        "  networking.interfaces.lan = {",
+    ]
+)
+
+# ``%s`` receives the escaped root authorized key.
+_AUTO_BLOCK_SSH_TEMPLATE = "\n".join(
+    [
+        "  };",
+        "",
+        "  services.openssh = {",
+        "    enable = true;",
+        "    settings = {",
+        "      PasswordAuthentication = false;",
+        '      PermitRootLogin = "prohibit-password";',
+        "    };",
+        "  };",
+        "",
+        "  users.users.root.openssh.authorizedKeys.keys = [",
+        '    "%s"',
+        "  ];",
+        "",
+        "  systemd.network.enable = true;",
+        '  systemd.network.networks."lan" = {',
+    ]
+)
+
+_AUTO_BLOCK_MDADM = "\n".join(
+    [
+        "  boot.swraid.mdadmConf = ''",
+        "    MAILADDR root",
+        "  '';",
+        "",
+    ]
+)
+
+_AUTO_BLOCK_FOOTER = "\n".join(
+    [
+        "  boot.swraid.enable = true;",
+        "  boot.initrd.services.lvm.enable = true;",
+        '  boot.kernelParams = [ "console=tty0" "console=ttyS0,115200n8" ];',
+        "  boot.loader.grub.extraConfig = ''",
+        "    serial --speed=115200 --unit=0 --word=8 --parity=no --stop=1",
+        "    terminal_input serial console",
+        "    terminal_output serial console",
+        "  '';",
+        "",
+        '  nix.settings.experimental-features = [ "nix-command" "flakes" ];',
+        "  " + _BLOCK_END,
+    ]
+)
+
+
 def _inject_configuration(
     root_path: Path,
     key_text: str,
@@ -537,25 +745,17 @@ def _inject_configuration(
     try:
         existing = config_path.read_text(encoding="utf-8")
     except FileNotFoundError:
-        existing = "{\n}\n"
+        existing = _BASELINE_CONFIG
 
-    lines = existing.splitlines()
-    filtered: list[str] = []
-    skipping = False
-    for line in lines:
-        stripped = line.strip()
-        if stripped == _BLOCK_START:
-            skipping = True
-            continue
-        if stripped == _BLOCK_END:
-            skipping = False
-            continue
-        if skipping:
-            continue
-        filtered.append(line)
+    if _BLOCK_START in existing or _BLOCK_END in existing:
+        base = _MANAGED_BLOCK_PATTERN.sub("", existing)
+    else:
+        # First install: no managed block to strip.
+        base = existing
+    filtered = _ensure_auto_install_import(base.splitlines())
+    joined = "\n".join(filtered)
 
     _write_auto_install_module(root_path)
-    filtered = _ensure_auto_install_import(filtered)
 
     filesystems, swaps = _collect_storage_definitions(storage_plan)
 
@@ -563,17 +763,7 @@ def _inject_configuration(
     use_dhcp = install_network is None
 
     block_lines = [
-        "  # pre-nixos auto-install start",
-        "  networking.firewall = {",
-        "    enable = true;",
-        "    allowPing = true;",
-        "    allowedTCPPorts = [ 22 ];",
-        "    allowedUDPPorts = [ ];",
-        "  };",
-        "",
-        "  networking.useDHCP = false;",
-        "  networking.useNetworkd = true;",
-        "  networking.interfaces.lan = {",
+        _AUTO_BLOCK_HEADER,
         f"    useDHCP = {'true' if use_dhcp else 'false'};",
     ]
 
@@ -586,26 +776,7 @@ def _inject_configuration(
             + "; } ];"
         )
 
-    block_lines.extend(
-        [
-            "  };",
-            "",
-            "  services.openssh = {",
-            "    enable = true;",
-            "    settings = {",
-            "      PasswordAuthentication = false;",
-            '      PermitRootLogin = "prohibit-password";',
-            "    };",
-            "  };",
-            "",
-            "  users.users.root.openssh.authorizedKeys.keys = [",
-            f'    "{_escape_nix_string(key_text)}"',
-            "  ];",
-            "",
-            "  systemd.network.enable = true;",
-            '  systemd.network.networks."lan" = {',
-        ]
-    )
+    block_lines.append(_AUTO_BLOCK_SSH_TEMPLATE % _escape_nix_string(key_text))
 
     if lan.mac_address:
         block_lines.append(
@@ -666,14 +837,7 @@ def _inject_configuration(
         ]
     )
 
-    block_lines.extend(
-        [
-            "  boot.swraid.mdadmConf = ''",
-            "    MAILADDR root",
-            "  '';",
-            "",
-        ]
-    )
+    block_lines.append(_AUTO_BLOCK_MDADM)
 
     tmpfiles_rules: list[str] = []
     if filesystems:
@@ -730,39 +894,22 @@ def _inject_configuration(
     block_lines.append("  ];")
     block_lines.append("")
 
-    block_lines.extend(
-        [
-            "  boot.swraid.enable = true;",
-            "  boot.initrd.services.lvm.enable = true;",
-            '  boot.kernelParams = [ "console=tty0" "console=ttyS0,115200n8" ];',
-            "  boot.loader.grub.extraConfig = ''",
-            "    serial --speed=115200 --unit=0 --word=8 --parity=no --stop=1",
-            "    terminal_input serial console",
-            "    terminal_output serial console",
-            "  '';",
-            "",
-            '  nix.settings.experimental-features = [ "nix-command" "flakes" ];',
-            "  # pre-nixos auto-install end",
-        ]
-    )
+    block_lines.append(_AUTO_BLOCK_FOOTER)
+    block_text = "\n".join(block_lines) + "\n"
 
-    terminator_index = None
-    for index in range(len(filtered) - 1, -1, -1):
-        if filtered[index].strip() == "}":
-            terminator_index = index
-            break
-
-    if terminator_index is None:
-        filtered.extend(block_lines)
-        filtered.append("}")
+    terminator_offset = _find_terminator_offset(joined)
+    if terminator_offset is None:
+        text = (joined + "\n" if filtered else "") + block_text + "}\n"
     else:
-        filtered = filtered[:terminator_index] + block_lines + filtered[terminator_index:]
-
-    text = "\n".join(filtered)
-    if not text.endswith("\n"):
-        text += "\n"
+        text = joined[:terminator_offset] + block_text + joined[terminator_offset:]
+        if filtered[-1]:
+            text += "\n"
+    if text == existing:
+        # Re-running with identical inputs leaves the file untouched.
+        return
 
-    config_path.write_text(text, encoding="utf-8")
+    with open(config_path, "w", encoding="utf-8") as handle:
+        handle.write(text)
 
 
 def _rewrite_hardware_configuration(root_path: Path) -> None:
@@ -774,6 +921,14 @@ def _rewrite_hardware_configuration(root_path: Path) -> None:
     except FileNotFoundError:
         return
 
+    if (
+        "networking.useDHCP" not in existing
+        and "fileSystems." not in existing
+        and "swapDevices" not in existing
+    ):
+        # Nothing to strip; leave the generated file untouched.
+        return
+
     lines = existing.splitlines()
     filtered: list[str] = []
     skipping = False
@@ -786,9 +941,7 @@ def _rewrite_hardware_configuration(root_path: Path) -> None:
         stripped = line.strip()
         if "networking.useDHCP" in stripped:
             continue
-        if not skipping and (
-            stripped.startswith("fileSystems.") or stripped.startswith("swapDevices")
-        ):
+        if not skipping and _HARDWARE_SKIP_PATTERN.match(stripped):
             skipping = True
             depth = depth_delta(line)
             if ";" in line and depth <= 0:
@@ -807,6 +960,43 @@ def _rewrite_hardware_configuration(root_path: Path) -> None:
     config_path.write_text(text, encoding="utf-8")
 
 
+def _copy_file_contents(source: Path, destination: Path, mode: int) -> None:
+    """Copy ``source`` to ``destination`` in the kernel and apply ``mode``.
+
+    ``copy_file_range`` is tried first; ``sendfile`` continues from the same
+    offsets when the kernel or filesystem does not support it for the given
+    pair of files.  The mode is set through the destination descriptor.
+    """
+
+    src_fd = os.open(source, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        dst_fd = os.open(
+            destination, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, mode
+        )
+        try:
+            os.fchmod(dst_fd, mode)
+            remaining = os.fstat(src_fd).st_size
+            use_copy_file_range = True
+            while remaining > 0:
+                if use_copy_file_range:
+                    try:
+                        copied = os.copy_file_range(src_fd, dst_fd, remaining)
+                    except OSError as error:
+                        if error.errno not in _COPY_FILE_RANGE_UNSUPPORTED:
+                            raise
+                        use_copy_file_range = False
+                        continue
+                else:
+                    copied = os.sendfile(dst_fd, src_fd, None, remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+
 def _copy_unit(source: Optional[Path], target_dir: Path) -> Optional[Path]:
     """Copy ``source`` into ``target_dir`` preserving contents."""
 
@@ -817,17 +1007,48 @@ def _copy_unit(source: Optional[Path], target_dir: Path) -> Optional[Path]:
 
     target_dir.mkdir(parents=True, exist_ok=True)
     destination = target_dir / source.name
-    shutil.copyfile(source, destination)
-    os.chmod(destination, 0o644)
+    _copy_file_contents(source, destination, 0o644)
     return destination
 
 
+def _copy_network_units(
+    lan: LanConfiguration,
+    root_path: Path,
+    install_network: Optional[InstallNetworkConfig],
+) -> Dict[str, str]:
+    """Copy the LAN systemd units into the installed system."""
+
+    target_dir = root_path / "etc/systemd/network"
+    copied_units: Dict[str, str] = {}
+    for label, source in {
+        "rename_rule": lan.rename_rule,
+        "network_unit": lan.network_unit,
+    }.items():
+        if source is None:
+            continue
+        if label == "network_unit" and install_network is not None:
+            continue
+        destination = _copy_unit(source, target_dir)
+        copied_units[label] = str(destination)
+    if copied_units:
+        log_event(
+            "pre_nixos.install.network_units_copied",
+            files=copied_units,
+        )
+    return copied_units
+
+
 def _format_timestamp(moment: datetime) -> str:
     """Return ``moment`` formatted as an ISO-like UTC string."""
 
-    if moment.tzinfo is None:
-        moment = moment.replace(tzinfo=timezone.utc)
-    return moment.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+    # Naive values are already treated as UTC, so only aware non-UTC values
+    # need converting before the fields are formatted directly.
+    if moment.tzinfo is not None and moment.tzinfo is not timezone.utc:
+        moment = moment.astimezone(timezone.utc)
+    return (
+        f"{moment.year:04d}-{moment.month:02d}-{moment.day:02d} "
+        f"{moment.hour:02d}:{moment.minute:02d}:{moment.second:02d}Z"
+    )
 
 
 def _broadcast_install_message(message: str) -> Tuple[bool, Dict[str, bool]] | None:
@@ -857,11 +1078,10 @@ def _broadcast_install_message(message: str) -> Tuple[bool, Dict[str, bool]] | N
     return success, payload
 
 
-def _write_installation_issue(root_path: Path, completed_at: datetime) -> Optional[Path]:
-    """Update ``/etc/issue`` with the automated installation timestamp."""
+def _write_installation_issue(root_path: Path, timestamp: str) -> Optional[Path]:
+    """Update ``/etc/issue`` with the formatted installation ``timestamp``."""
 
     issue_path = root_path / "etc/issue"
-    timestamp = _format_timestamp(completed_at)
     header = (
         "Automatic NixOS installation completed by pre-nixos.\n"
         f"Installation timestamp (UTC): {timestamp}\n\n"
@@ -999,10 +1219,21 @@ def auto_install(
     _broadcast_install_message(start_message)
 
     log_event("pre_nixos.install.generate_config.start", root_path=root_path)
-    result = subprocess.run(
-        ["nixos-generate-config", "--root", str(root_path)],
-        check=False,
-    )
+    # ``nixos-generate-config`` only touches ``/etc/nixos``; copy the network
+    # units into ``/etc/systemd/network`` while it runs.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        generate = executor.submit(
+            subprocess.run,
+            ["nixos-generate-config", "--root", str(root_path)],
+            check=False,
+        )
+        copy_error: Optional[Exception] = None
+        try:
+            _copy_network_units(lan, root_path, install_network)
+        except Exception as exc:
+            copy_error = exc
+        result = generate.result()
+
     if result.returncode != 0:
         log_event(
             "pre_nixos.install.generate_config.failed",
@@ -1019,41 +1250,23 @@ def auto_install(
         returncode=result.returncode,
     )
 
-    try:
-        _inject_configuration(root_path, key_text, lan, storage_plan, install_network)
-        _rewrite_hardware_configuration(root_path)
-    except Exception as exc:  # pragma: no cover - unexpected filesystem errors
-        log_event("pre_nixos.install.configuration_write_failed", error=str(exc))
+    if copy_error is not None:
+        log_event("pre_nixos.install.network_unit_copy_failed", error=str(copy_error))
         return _record_result(
             "failed",
             status_dir=status_dir,
-            reason="configuration-write",
+            reason="network-unit-copy",
         )
 
     try:
-        target_dir = root_path / "etc/systemd/network"
-        copied_units = {}
-        for label, source in {
-            "rename_rule": lan.rename_rule,
-            "network_unit": lan.network_unit,
-        }.items():
-            if source is None:
-                continue
-            if label == "network_unit" and install_network is not None:
-                continue
-            destination = _copy_unit(source, target_dir)
-            copied_units[label] = str(destination)
-        if copied_units:
-            log_event(
-                "pre_nixos.install.network_units_copied",
-                files=copied_units,
-            )
-    except Exception as exc:
-        log_event("pre_nixos.install.network_unit_copy_failed", error=str(exc))
+        _inject_configuration(root_path, key_text, lan, storage_plan, install_network)
+        _rewrite_hardware_configuration(root_path)
+    except Exception as exc:  # pragma: no cover - unexpected filesystem errors
+        log_event("pre_nixos.install.configuration_write_failed", error=str(exc))
         return _record_result(
             "failed",
             status_dir=status_dir,
-            reason="network-unit-copy",
+            reason="configuration-write",
         )
 
     log_event("pre_nixos.install.nixos_install.start", root_path=root_path)
@@ -1078,10 +1291,9 @@ def auto_install(
         returncode=result.returncode,
     )
 
-    completed_at = datetime.now(timezone.utc)
+    completed_at = _format_timestamp(datetime.now(timezone.utc))
     completion_message = (
-        "Automatic NixOS installation completed at "
-        f"{_format_timestamp(completed_at)} UTC."
+        f"Automatic NixOS installation completed at {completed_at} UTC."
     )
     print(completion_message)
     completion_broadcast = _broadcast_install_message(completion_message)
@@ -1091,7 +1303,7 @@ def auto_install(
 
     details: Dict[str, str] = {
         "root_path": str(root_path),
-        "completed_at": _format_timestamp(completed_at),
+        "completed_at": completed_at,
         "reboot": "requested" if reboot_requested else "skipped",
     }
     if issue_path is not None:
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import List
 import math
+import os
 
 
 @dataclass
@@ -18,9 +19,12 @@ class Disk:
     nvme: bool = False
 
 
-def _read_text(path: Path) -> str:
+def _read_text(path: str) -> str:
+    """Return the stripped contents of the sysfs attribute at ``path``."""
+
     try:
-        return path.read_text().strip()
+        with open(path, "rb") as handle:
+            return handle.read().strip().decode("utf-8", "replace")
     except FileNotFoundError:
         return ""
 
@@ -32,28 +36,32 @@ def enumerate_disks(sys_block: Path = Path("/sys/block")) -> List[Disk]:
         sys_block: Path to ``/sys/block`` (overridable for tests).
 
     Returns:
-        A list of :class:`Disk` objects for non-removable, non-virtual devices.
+        A list of :class:`Disk` objects for non-removable, non-virtual devices
+        with media present (non-zero size).
     """
     disks: List[Disk] = []
     try:
-        entries = list(sys_block.iterdir())
+        with os.scandir(sys_block) as iterator:
+            entries = [(entry.name, entry.path) for entry in iterator]
     except (FileNotFoundError, NotADirectoryError, PermissionError):
         return disks
 
-    for entry in entries:
-        name = entry.name
+    for name, path in entries:
         if name.startswith(("loop", "ram", "dm", "sr", "md")):
             continue
-        if _read_text(entry / "removable") == "1":
+        if _read_text(f"{path}/removable") == "1":
             continue
-        model = _read_text(entry / "device" / "model")
-        rotational = _read_text(entry / "queue" / "rotational") == "1"
-        size_str = _read_text(entry / "size")
+        # Check the size before the descriptive attributes so empty devices
+        # (e.g. card readers without media) cost a single extra read.
         try:
-            size = int(size_str) * 512
+            size = int(_read_text(f"{path}/size")) * 512
         except ValueError:
             size = 0
-        serial = _read_text(entry / "device" / "serial")
+        if size <= 0:
+            continue
+        model = _read_text(f"{path}/device/model")
+        rotational = _read_text(f"{path}/queue/rotational") == "1"
+        serial = _read_text(f"{path}/device/serial")
         nvme = name.startswith("nvme")
         disks.append(
             Disk(
@@ -2,28 +2,69 @@
 
 from __future__ import annotations
 
+import atexit
 import datetime as _dt
 import json
 import os
 import sys
 from pathlib import Path
-from typing import Any, Mapping, Sequence
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence
 
+_UTC = _dt.timezone.utc
 
-def _serialise(value: Any) -> Any:
-    """Return a JSON-friendly representation of *value*."""
 
-    if isinstance(value, (str, int, float, bool)) or value is None:
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _serialise_mapping(value: Mapping[Any, Any]) -> Dict[str, Any]:
+    return {str(key): _serialise(item) for key, item in value.items()}
+
+
+def _serialise_sequence(value: Sequence[Any]) -> list:
+    return [_serialise(item) for item in value]
+
+
+def _serialise_fallback(value: Any) -> Any:
+    """Handle subclasses and other types missing from ``_SERIALISERS``."""
+
+    if isinstance(value, (str, int, float, bool)):
         return value
     if isinstance(value, Path):
         return str(value)
     if isinstance(value, Mapping):
-        return {str(key): _serialise(item) for key, item in value.items()}
+        return _serialise_mapping(value)
     if isinstance(value, Sequence) and not isinstance(value, (str, bytes, bytearray)):
-        return [_serialise(item) for item in value]
+        return _serialise_sequence(value)
     return repr(value)
 
 
+_JSON_SCALARS = frozenset({str, int, float, bool, type(None)})
+
+# Exact-type dispatch for the common cases; one dict lookup replaces the
+# ``isinstance`` chain in ``_serialise_fallback``.
+_SERIALISERS: Dict[type, Callable[[Any], Any]] = {
+    str: _identity,
+    int: _identity,
+    float: _identity,
+    bool: _identity,
+    type(None): _identity,
+    type(Path()): str,
+    dict: _serialise_mapping,
+    list: _serialise_sequence,
+    tuple: _serialise_sequence,
+}
+
+
+def _serialise(value: Any) -> Any:
+    """Return a JSON-friendly representation of *value*."""
+
+    handler = _SERIALISERS.get(type(value))
+    if handler is None:
+        return _serialise_fallback(value)
+    return handler(value)
+
+
 def _logs_enabled() -> bool:
     """Return ``True`` when structured logging is enabled via the environment."""
 
@@ -39,23 +80,30 @@ def log_event(event: str, **fields: Any) -> None:
     The entry includes an ISO-8601 UTC timestamp so the consumer can reconstruct
     execution order even when journal output interleaves with other services.
     Non-JSON-serialisable values are converted to strings via ``repr``.
+    The environment is read once at import; call :func:`reload_config` after
+    changing ``PRE_NIXOS_LOG_EVENTS`` or ``PRE_NIXOS_LOG_FILE``.
     """
 
-    if not _logs_enabled():
+    if not _LOGS_ENABLED:
         return
 
     record = {
-        "timestamp": _dt.datetime.now(_dt.timezone.utc).isoformat(),
+        "timestamp": _dt.datetime.now(_UTC).isoformat(),
         "event": event,
     }
     for key, value in fields.items():
-        record[str(key)] = _serialise(value)
+        # Most fields are plain strings, numbers or flags; skip the call.
+        record[str(key)] = (
+            value if type(value) in _JSON_SCALARS else _serialise(value)
+        )
 
-    message = json.dumps(record, sort_keys=True)
+    # ``record`` is built in a fixed order, so the keys need no sorting.
+    message = json.dumps(record, separators=(",", ":"))
 
-    sys.stderr.write(message + "\n")
+    line = message + "\n"
+    sys.stderr.write(line)
     sys.stderr.flush()
-    _append_to_log_file(message)
+    _append_to_log_file(line)
 
 _DEFAULT_LOG_FILE_PATH = Path(__file__).with_name("default_log_file_path.txt")
 _DEFAULT_LOG_FILE = Path(_DEFAULT_LOG_FILE_PATH.read_text().strip())
@@ -74,14 +122,68 @@ def _log_file_path() -> Path:
     return Path(value)
 
 
-def _append_to_log_file(message: str) -> None:
-    """Append the given JSON *message* to the configured log file."""
+_LOG_FD: Optional[int] = None
+_LOG_FILE_FAILED = False
 
-    log_file = _log_file_path()
+
+def _close_log_file() -> None:
+    """Close the log file descriptor kept open by :func:`_append_to_log_file`."""
+
+    global _LOG_FD
+    if _LOG_FD is None:
+        return
+    fd, _LOG_FD = _LOG_FD, None
+    try:
+        os.close(fd)
+    except OSError:  # pragma: no cover - nothing useful to report at close
+        pass
+
+
+atexit.register(_close_log_file)
+
+
+def reload_config() -> None:
+    """Re-read the logging settings from the environment."""
+
+    global _LOGS_ENABLED, _LOG_FILE, _LOG_FILE_FAILED
+    _close_log_file()
+    _LOG_FILE_FAILED = False
+    _LOGS_ENABLED = _logs_enabled()
+    _LOG_FILE = _log_file_path()
+
+
+_LOGS_ENABLED = False
+_LOG_FILE = _DEFAULT_LOG_FILE
+reload_config()
+
+
+def _append_to_log_file(line: str) -> None:
+    """Append the newline-terminated JSON *line* to the configured log file.
+
+    The file is opened once with ``O_APPEND`` and the descriptor is reused for
+    later entries, so each entry costs a single ``write``. After the first
+    failure the file is skipped until :func:`reload_config` runs; entries
+    still reach ``stderr``.
+    """
+
+    global _LOG_FD, _LOG_FILE_FAILED
+    if _LOG_FILE_FAILED:
+        return
+    log_file = _LOG_FILE
     try:
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-        with log_file.open("a", encoding="utf-8") as handle:
-            handle.write(message + "\n")
-    except OSError as exc:  # pragma: no cover - defensive logging path
+        if _LOG_FD is None:
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            _LOG_FD = os.open(
+                log_file,
+                os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC,
+                0o644,
+            )
+        data = line.encode("utf-8")
+        while data:
+            data = data[os.write(_LOG_FD, data):]
+    except OSError as exc:
+        # ENOSPC or EIO would fail every later entry as well; report once.
+        _LOG_FILE_FAILED = True
+        _close_log_file()
         sys.stderr.write(f"pre-nixos: failed to write log to {log_file}: {exc}\n")
         sys.stderr.flush()
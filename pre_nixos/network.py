@@ -6,11 +6,13 @@ import errno
 import ipaddress
 import json
 import os
+import select
+import socket
 import subprocess
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Sequence
+from typing import Iterator, Optional, Sequence
 
 from .console import broadcast_to_consoles
 from .logging_utils import log_event
@@ -37,6 +39,9 @@ class IPv4Details:
     gateway: Optional[str] = None
 
 
+# ``RTMGRP_LINK`` multicast group: RTM_NEWLINK/RTM_DELLINK notifications.
+_RTMGRP_LINK = 0x1
+
 _TRANSIENT_SYSFS_ERRNOS = {
     errno.EINVAL,
     errno.ENODEV,
@@ -115,6 +120,30 @@ def _systemctl(args: list[str], *, ignore_missing: bool = False) -> None:
         raise subprocess.CalledProcessError(result.returncode, command)
 
 
+def _read_sysfs_attribute(path: str) -> str:
+    """Return the stripped contents of the short sysfs attribute at ``path``."""
+
+    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        return os.read(fd, 64).decode("utf-8", "replace").strip()
+    finally:
+        os.close(fd)
+
+
+def _physical_interfaces(net_path: Path) -> Iterator[str]:
+    """Yield the names of interfaces in ``net_path`` backed by a device.
+
+    Names are sorted so the same NIC wins whenever several have link; the
+    ``device`` check runs lazily so callers that stop early skip the rest.
+    """
+
+    with os.scandir(net_path) as entries:
+        names = sorted(entry.name for entry in entries)
+    for name in names:
+        if os.path.exists(f"{net_path}/{name}/device"):
+            yield name
+
+
 def identify_lan(net_path: Path = Path("/sys/class/net")) -> Optional[str]:
     """Identify the NIC with link and return its name.
 
@@ -124,12 +153,10 @@ def identify_lan(net_path: Path = Path("/sys/class/net")) -> Optional[str]:
     Returns:
         Name of the first interface with carrier link or ``None`` if none found.
     """
-    for iface in sorted(net_path.iterdir()):
-        if not (iface / "device").exists():
-            continue
+    for name in _physical_interfaces(net_path):
+        iface_path = f"{net_path}/{name}"
         try:
-            carrier_path = iface / "carrier"
-            carrier = carrier_path.read_text().strip()
+            carrier = _read_sysfs_attribute(f"{iface_path}/carrier")
         except FileNotFoundError:
             carrier = None
         except OSError as error:
@@ -140,10 +167,10 @@ def identify_lan(net_path: Path = Path("/sys/class/net")) -> Optional[str]:
         if carrier == "1":
             log_event(
                 "pre_nixos.network.identify_lan.detected",
-                interface=iface.name,
+                interface=name,
                 signal="carrier",
             )
-            return iface.name
+            return name
         if carrier is not None:
             continue
 
@@ -152,7 +179,7 @@ def identify_lan(net_path: Path = Path("/sys/class/net")) -> Optional[str]:
         # carrier cannot be determined, fall back to ``operstate`` to avoid
         # crashing during provisioning.
         try:
-            operstate = (iface / "operstate").read_text().strip().lower()
+            operstate = _read_sysfs_attribute(f"{iface_path}/operstate").lower()
         except FileNotFoundError:
             continue
         except OSError as error:
@@ -162,10 +189,59 @@ def identify_lan(net_path: Path = Path("/sys/class/net")) -> Optional[str]:
         if operstate == "up":
             log_event(
                 "pre_nixos.network.identify_lan.detected",
-                interface=iface.name,
+                interface=name,
                 signal="operstate",
             )
-            return iface.name
+            return name
+    return None
+
+
+def _open_link_monitor() -> Optional[socket.socket]:
+    """Return a non-blocking rtnetlink socket subscribed to link changes.
+
+    Returns ``None`` when netlink is unavailable so callers fall back to
+    sleeping between scans.
+    """
+
+    try:
+        monitor = socket.socket(
+            socket.AF_NETLINK,
+            socket.SOCK_RAW | socket.SOCK_CLOEXEC,
+            socket.NETLINK_ROUTE,
+        )
+    except (AttributeError, OSError):
+        return None
+    try:
+        monitor.bind((0, _RTMGRP_LINK))
+        monitor.setblocking(False)
+    except OSError:
+        monitor.close()
+        return None
+    return monitor
+
+
+def _wait_for_link_event(
+    monitor: socket.socket, net_path: Path, timeout: float
+) -> Optional[str]:
+    """Rescan ``net_path`` on each link notification until ``timeout`` elapses."""
+
+    deadline = time.monotonic() + timeout
+    remaining = timeout
+    while remaining > 0:
+        ready, _, _ = select.select([monitor], [], [], remaining)
+        if not ready:
+            return None
+        # Drain the queued notifications; their content does not matter
+        # because sysfs is rescanned. ``ENOBUFS`` (overflow) also ends here.
+        while True:
+            try:
+                monitor.recv(65536)
+            except OSError:
+                break
+        iface = identify_lan(net_path)
+        if iface is not None:
+            return iface
+        remaining = deadline - time.monotonic()
     return None
 
 
@@ -175,37 +251,49 @@ def wait_for_lan(
     attempts: int = 30,
     delay: float = 2.0,
 ) -> Optional[str]:
-    """Poll for an active LAN interface and return its name when detected."""
+    """Poll for an active LAN interface and return its name when detected.
+
+    Between attempts the wait is cut short by rtnetlink link notifications,
+    so a carrier that comes up mid-interval is noticed immediately.
+    """
 
     exec_enabled = os.environ.get("PRE_NIXOS_EXEC") == "1"
     sleep_interval = delay if exec_enabled else min(delay, 0.1)
+    monitor = _open_link_monitor()
 
     log_event(
         "pre_nixos.network.wait_for_lan.start",
         attempts=attempts,
         delay_seconds=delay,
         net_path=net_path,
+        link_events=monitor is not None,
     )
-    for _ in range(attempts):
-        if exec_enabled:
-            for candidate in sorted(net_path.iterdir()):
-                if not (candidate / "device").exists():
-                    continue
-                try:
-                    _run(["ip", "link", "set", candidate.name, "up"])
-                except subprocess.CalledProcessError:
-                    # ``_run`` already logged the failure; continue probing the
-                    # remaining interfaces so a transient error does not abort the
-                    # wait loop.
+    try:
+        for _ in range(attempts):
+            if exec_enabled:
+                for candidate in _physical_interfaces(net_path):
+                    try:
+                        _run(["ip", "link", "set", candidate, "up"])
+                    except subprocess.CalledProcessError:
+                        # ``_run`` already logged the failure; continue probing
+                        # the remaining interfaces so a transient error does not
+                        # abort the wait loop.
+                        continue
+            iface = identify_lan(net_path)
+            if iface is None:
+                if monitor is None:
+                    time.sleep(sleep_interval)
                     continue
-        iface = identify_lan(net_path)
-        if iface is not None:
-            log_event(
-                "pre_nixos.network.wait_for_lan.detected",
-                interface=iface,
-            )
-            return iface
-        time.sleep(sleep_interval)
+                iface = _wait_for_link_event(monitor, net_path, sleep_interval)
+            if iface is not None:
+                log_event(
+                    "pre_nixos.network.wait_for_lan.detected",
+                    interface=iface,
+                )
+                return iface
+    finally:
+        if monitor is not None:
+            monitor.close()
     log_event("pre_nixos.network.wait_for_lan.timeout", attempts=attempts, delay_seconds=delay)
     return None
 
@@ -18,3 +18,13 @@ def pytest_addoption(parser: pytest.Parser) -> None:
 
 # Ensure repository root is importable
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pre_nixos import logging_utils  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _reset_logging_config():
+    """Re-read the logging settings once ``monkeypatch`` restores the env."""
+
+    yield
+    logging_utils.reload_config()
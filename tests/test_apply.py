@@ -12,6 +12,7 @@ from typing import Callable
 import pytest
 
 import pre_nixos.apply as apply_module
+from pre_nixos import logging_utils
 from pre_nixos.inventory import Disk
 from pre_nixos.planner import plan_storage
 from pre_nixos.apply import apply_plan
@@ -194,6 +195,7 @@ def test_apply_plan_logs_command_execution(
 
     monkeypatch.setenv("PRE_NIXOS_EXEC", "1")
     monkeypatch.setenv("PRE_NIXOS_LOG_EVENTS", "1")
+    logging_utils.reload_config()
     monkeypatch.setattr(
         apply_module.storage_cleanup,
         "perform_storage_cleanup",
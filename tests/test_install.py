@@ -1,6 +1,6 @@
 """Tests for the automated installation helper."""
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import pytest
@@ -519,3 +519,353 @@ def test_auto_install_dry_run_skips(monkeypatch, tmp_path, broadcast_messages):
     status_text = (tmp_path / "status" / "auto-install-status").read_text()
     assert status_text.startswith("STATE=skipped\nREASON=dry-run")
     assert broadcast_messages == []
+
+
+def test_load_ip_announcement_script_is_cached():
+    first = install._load_ip_announcement_script()
+    second = install._load_ip_announcement_script()
+    assert isinstance(first, tuple)
+    assert first is second
+    assert first[0] == "set -euo pipefail"
+
+
+def test_rewrite_hardware_configuration_leaves_clean_file_untouched(tmp_path):
+    config_dir = tmp_path / "etc/nixos"
+    config_dir.mkdir(parents=True)
+    config_path = config_dir / "hardware-configuration.nix"
+    original = "{\n  boot.initrd.availableKernelModules = [ \"ahci\" ];\n}"
+    config_path.write_text(original, encoding="utf-8")
+
+    install._rewrite_hardware_configuration(tmp_path)
+
+    assert config_path.read_text(encoding="utf-8") == original
+
+
+def test_wait_for_mount_backs_off_exponentially(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRE_NIXOS_EXEC", "1")
+    clock = [0.0]
+    sleeps: list[float] = []
+
+    def fake_sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(install.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(install.time, "sleep", fake_sleep)
+    monkeypatch.setattr(install, "_open_mount_watch", lambda: None)
+    monkeypatch.setattr(install, "_is_mount_ready", lambda _: False)
+
+    assert install._wait_for_mount(tmp_path, attempts=2, delay=0.05) is False
+    assert sleeps[:4] == [0.005, 0.01, 0.02, 0.04]
+    assert all(seconds <= 0.05 for seconds in sleeps)
+    assert clock[0] == pytest.approx(0.1)
+
+
+def test_wait_for_mount_detects_ready_mount_quickly(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRE_NIXOS_EXEC", "1")
+    sleeps: list[float] = []
+    checks = iter([False, False, True])
+
+    monkeypatch.setattr(install.time, "sleep", sleeps.append)
+    monkeypatch.setattr(install, "_open_mount_watch", lambda: None)
+    monkeypatch.setattr(install, "_is_mount_ready", lambda _: next(checks))
+
+    assert install._wait_for_mount(tmp_path, attempts=30, delay=1.0) is True
+    assert sleeps == [0.005, 0.01]
+
+
+def test_wait_for_mount_blocks_on_mount_table_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRE_NIXOS_EXEC", "1")
+    timeouts: list[int] = []
+    checks = iter([False, True])
+    read_fd, write_fd = install.os.pipe()
+    install.os.close(write_fd)
+
+    class FakePoller:
+        def poll(self, timeout_ms: int):
+            timeouts.append(timeout_ms)
+            return [(read_fd, install.select.POLLPRI)]
+
+    monkeypatch.setattr(install, "_open_mount_watch", lambda: (read_fd, FakePoller()))
+    monkeypatch.setattr(install.time, "sleep", lambda _: pytest.fail("unexpected sleep"))
+    monkeypatch.setattr(install, "_is_mount_ready", lambda _: next(checks))
+
+    assert install._wait_for_mount(tmp_path, attempts=30, delay=1.0) is True
+    assert timeouts == [1000]
+    with pytest.raises(OSError):
+        install.os.fstat(read_fd)
+
+
+def test_escape_nix_indented_line_preserves_attribute_paths():
+    line = 'echo "${iface}" ${pkgs.iproute2}/bin/ip ${config.networking.hostName}'
+    assert install._escape_nix_indented_line(line) == (
+        "echo \"''${iface}\" ${pkgs.iproute2}/bin/ip ${config.networking.hostName}"
+    )
+
+
+def test_inject_configuration_baseline_matches_missing_file(tmp_path):
+    lan = _make_lan(tmp_path)
+    key_text = lan.authorized_key.read_text()
+
+    missing_root = tmp_path / "missing"
+    install._inject_configuration(missing_root, key_text, lan, _sample_storage_plan())
+
+    baseline_root = tmp_path / "baseline"
+    config_dir = baseline_root / "etc/nixos"
+    config_dir.mkdir(parents=True)
+    (config_dir / "configuration.nix").write_text("{\n}\n", encoding="utf-8")
+    install._inject_configuration(baseline_root, key_text, lan, _sample_storage_plan())
+
+    missing_text = (missing_root / "etc/nixos/configuration.nix").read_text()
+    baseline_text = (config_dir / "configuration.nix").read_text()
+    assert missing_text == baseline_text
+    assert missing_text.startswith("{\n  imports = [\n")
+    assert missing_text.endswith("  # pre-nixos auto-install end\n}\n")
+
+
+def test_inject_configuration_replaces_existing_block(tmp_path):
+    root = tmp_path / "mnt"
+    lan = _make_lan(tmp_path)
+    key_text = lan.authorized_key.read_text()
+    config_dir = root / "etc/nixos"
+    config_dir.mkdir(parents=True)
+    config_path = config_dir / "configuration.nix"
+    config_path.write_text(
+        "{ config, pkgs, ... }:\n\n{\n"
+        "  imports =\n"
+        "    [ # Include the results of the hardware scan.\n"
+        "      ./hardware-configuration.nix\n"
+        "    ];\n"
+        "}\n",
+        encoding="utf-8",
+    )
+
+    install._inject_configuration(root, key_text, lan, _sample_storage_plan())
+    first = config_path.read_text()
+    first_mtime = config_path.stat().st_mtime_ns
+    install.os.utime(config_path, ns=(first_mtime - 10**9, first_mtime - 10**9))
+    install._inject_configuration(root, key_text, lan, _sample_storage_plan())
+    second = config_path.read_text()
+
+    assert second == first
+    assert config_path.stat().st_mtime_ns == first_mtime - 10**9
+    assert first.count("# pre-nixos auto-install start") == 1
+    assert first.count("./pre-nixos-auto-install-ip.nix") == 1
+    assert first.endswith("  # pre-nixos auto-install end\n}\n")
+
+
+def test_copy_unit_falls_back_when_copy_file_range_unsupported(tmp_path, monkeypatch):
+    source = tmp_path / "10-lan.link"
+    source.write_text("[Match]\nOriginalName=eth0\n", encoding="utf-8")
+
+    def unsupported(*_args):
+        raise OSError(install.errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(install.os, "copy_file_range", unsupported)
+    target = tmp_path / "target"
+    target.mkdir()
+    (target / "10-lan.link").write_text("stale contents that are longer\n")
+    (target / "10-lan.link").chmod(0o600)
+
+    destination = install._copy_unit(source, target)
+
+    assert destination == tmp_path / "target" / "10-lan.link"
+    assert destination.read_text(encoding="utf-8") == source.read_text(encoding="utf-8")
+    assert destination.stat().st_mode & 0o777 == 0o644
+
+
+def test_auto_install_copies_units_while_generating_config(
+    tmp_path, monkeypatch, broadcast_messages
+):
+    root = tmp_path / "mnt"
+    (root / "etc").mkdir(parents=True)
+    lan = _make_lan(tmp_path)
+    network_dir = root / "etc/systemd/network"
+
+    def fake_run(cmd, check=False):
+        class Result:
+            returncode = 1
+
+        assert cmd[0] == "nixos-generate-config"
+        return Result()
+
+    copied: list[Path] = []
+    real_copy_unit = install._copy_unit
+
+    def tracking_copy_unit(source, target_dir):
+        copied.append(source)
+        return real_copy_unit(source, target_dir)
+
+    monkeypatch.setattr(install.subprocess, "run", fake_run)
+    monkeypatch.setattr(install, "_copy_unit", tracking_copy_unit)
+    monkeypatch.setenv("PRE_NIXOS_EXEC", "1")
+
+    result = install.auto_install(
+        lan,
+        _sample_storage_plan(),
+        root_path=root,
+        status_dir=tmp_path / "status",
+    )
+
+    assert result.status == "failed"
+    assert result.reason == "nixos-generate-config"
+    assert copied == [lan.rename_rule, lan.network_unit]
+    assert (network_dir / "10-lan.link").read_text() == lan.rename_rule.read_text()
+
+
+def test_collect_storage_definitions_falls_back_to_device_paths():
+    plan = _sample_storage_plan()
+    disko = plan["disko"]
+    del disko["disk"]["sda"]["content"]["partitions"]["sda1"]["content"]["extraArgs"]
+    del disko["lvm_vg"]["main"]["lvs"]["home"]["content"]["extraArgs"]
+    del disko["lvm_vg"]["main"]["lvs"]["swap"]["content"]["extraArgs"]
+
+    filesystems, swaps = install._collect_storage_definitions(plan)
+
+    assert [entry["mountpoint"] for entry in filesystems] == ["/", "/boot", "/home"]
+    assert filesystems[0]["label"] == "slash"
+    assert filesystems[1]["device"] == "/dev/sda1"
+    assert filesystems[1]["options"] == ["umask=0077"]
+    assert filesystems[2]["device"] == "/dev/main/home"
+    assert swaps == [{"device": "/dev/main/swap"}]
+
+
+def test_collect_storage_definitions_filters_invalid_mount_options():
+    plan = _sample_storage_plan()
+    home = plan["disko"]["lvm_vg"]["main"]["lvs"]["home"]["content"]
+    home["mountOptions"] = ["relatime", "", 7, "nodev"]
+
+    filesystems, _ = install._collect_storage_definitions(plan)
+
+    home_entry = next(entry for entry in filesystems if entry["mountpoint"] == "/home")
+    assert home_entry["options"] == ["relatime", "nodev"]
+
+
+def test_escape_nix_string_escapes_backslashes_and_quotes():
+    assert install._escape_nix_string('a\\b"c') == 'a\\\\b\\"c'
+    assert install._escape_nix_string("plain") == "plain"
+
+
+def test_managed_block_pattern_strips_block_and_stray_markers():
+    text = (
+        "{\n"
+        "  imports = [ ];\n"
+        "  # pre-nixos auto-install start\n"
+        "  services.openssh.enable = true;\n"
+        "  # pre-nixos auto-install end\n"
+        "  # pre-nixos auto-install end\n"
+        "  time.timeZone = \"UTC\";\n"
+        "}\n"
+    )
+    assert install._MANAGED_BLOCK_PATTERN.sub("", text) == (
+        "{\n  imports = [ ];\n  time.timeZone = \"UTC\";\n}\n"
+    )
+
+    unterminated = "{\n  # pre-nixos auto-install start\n  foo = 1;\n}\n"
+    assert install._MANAGED_BLOCK_PATTERN.sub("", unterminated) == "{\n"
+
+
+def test_find_terminator_offset_returns_last_closing_line():
+    text = "{\n  foo = {\n  };\n}\n# trailing };\n"
+    assert install._find_terminator_offset(text) == text.index("}\n#")
+    assert install._find_terminator_offset("{ foo = 1; }") is None
+
+
+def test_inject_configuration_empty_file_places_imports_first(tmp_path):
+    root = tmp_path / "mnt"
+    lan = _make_lan(tmp_path)
+    config_dir = root / "etc/nixos"
+    config_dir.mkdir(parents=True)
+    config_path = config_dir / "configuration.nix"
+    config_path.write_text("", encoding="utf-8")
+
+    install._inject_configuration(
+        root, lan.authorized_key.read_text(), lan, _sample_storage_plan()
+    )
+
+    content = config_path.read_text()
+    assert content.startswith(
+        "  imports = [\n    ./pre-nixos-auto-install-ip.nix\n  ];\n\n"
+        "  # pre-nixos auto-install start\n"
+    )
+    assert content.endswith("  # pre-nixos auto-install end\n}\n")
+
+
+def test_is_mount_ready_matches_escaped_mountinfo_entries(tmp_path, monkeypatch):
+    root = tmp_path / "target root"
+    root.mkdir()
+    escaped = str(root.resolve()).replace(" ", "\\040")
+    mountinfo = tmp_path / "mountinfo"
+    mountinfo.write_text(
+        "22 1 8:1 / / rw,relatime - ext4 /dev/sda1 rw\n"
+        f"40 22 8:2 / {escaped} rw,relatime - ext4 /dev/sda2 rw\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(install, "_MOUNTINFO_PATH", str(mountinfo))
+
+    assert install._is_mount_ready(root) is True
+
+    mountinfo.write_text("22 1 8:1 / / rw,relatime - ext4 /dev/sda1 rw\n", encoding="utf-8")
+    assert install._is_mount_ready(root) is False
+
+
+def test_record_result_replaces_status_atomically(tmp_path):
+    status_dir = tmp_path / "status"
+    install._record_result("failed", status_dir=status_dir, reason="first")
+    install._record_result(
+        "success", status_dir=status_dir, details={"root_path": "/mnt"}
+    )
+
+    assert sorted(path.name for path in status_dir.iterdir()) == ["auto-install-status"]
+    assert (status_dir / "auto-install-status").read_text() == (
+        "STATE=success\nROOT_PATH=/mnt\n"
+    )
+
+
+def test_record_result_logs_single_event_after_write(tmp_path, monkeypatch):
+    events = []
+
+    def record_event(event, **fields):
+        events.append((event, fields))
+
+    monkeypatch.setattr(install, "log_event", record_event)
+    status_dir = tmp_path / "status"
+
+    install._record_result("success", status_dir=status_dir)
+
+    assert [event for event, _ in events] == ["pre_nixos.install.result"]
+    fields = events[0][1]
+    assert fields["wrote_status"] is True
+    assert fields["status_path"] == status_dir / "auto-install-status"
+
+
+def test_record_result_reports_write_error_in_result_event(tmp_path, monkeypatch):
+    events = []
+
+    def record_event(event, **fields):
+        events.append((event, fields))
+
+    monkeypatch.setattr(install, "log_event", record_event)
+    blocker = tmp_path / "status"
+    blocker.write_text("not a directory")
+
+    result = install._record_result("failed", status_dir=blocker, reason="boom")
+
+    assert result.status == "failed"
+    assert [event for event, _ in events] == ["pre_nixos.install.result"]
+    fields = events[0][1]
+    assert fields["wrote_status"] is False
+    assert fields["write_error"]
+
+
+def test_format_timestamp_normalises_to_utc():
+    plus_two = timezone(timedelta(hours=2))
+    assert install._format_timestamp(
+        datetime(2024, 3, 5, 9, 7, 1, 999, tzinfo=plus_two)
+    ) == "2024-03-05 07:07:01Z"
+    assert install._format_timestamp(datetime(2024, 3, 5, 9, 7, 1)) == (
+        "2024-03-05 09:07:01Z"
+    )
+    assert install._format_timestamp(
+        datetime(2024, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
+    ) == "2024-12-31 23:59:59Z"
@@ -44,3 +44,28 @@ def test_detect_ram_gb(tmp_path: Path) -> None:
     meminfo = tmp_path / "meminfo"
     meminfo.write_text("MemTotal:       16777216 kB\n")
     assert detect_ram_gb(meminfo) == 16
+
+
+def test_enumerate_disks_defaults_missing_attributes(tmp_path: Path) -> None:
+    (tmp_path / "nvme0n1").mkdir()
+    (tmp_path / "nvme0n1" / "size").write_text("1024\n")
+
+    disks = enumerate_disks(tmp_path)
+
+    assert len(disks) == 1
+    d = disks[0]
+    assert d.name == "nvme0n1"
+    assert d.size == 1024 * 512
+    assert d.model == ""
+    assert d.serial == ""
+    assert d.rotational is False
+    assert d.nvme is True
+
+
+def test_enumerate_disks_skips_devices_without_media(tmp_path: Path) -> None:
+    create_disk(tmp_path, "sdc", size="0", model="CardReader")
+    create_disk(tmp_path, "sdd", size="2048", model="Disk")
+
+    disks = enumerate_disks(tmp_path)
+
+    assert [d.name for d in disks] == ["sdd"]
@@ -1,6 +1,8 @@
 import json
+from collections import OrderedDict, namedtuple
 from pathlib import Path
 
+from pre_nixos import logging_utils
 from pre_nixos.logging_utils import (
     _DEFAULT_LOG_FILE,
     _DEFAULT_LOG_FILE_PATH,
@@ -10,6 +12,7 @@ from pre_nixos.logging_utils import (
 
 def test_log_event_emits_json_to_stderr(capsys, monkeypatch) -> None:
     monkeypatch.setenv("PRE_NIXOS_LOG_EVENTS", "1")
+    logging_utils.reload_config()
 
     log_event("pre_nixos.test", path=Path("/tmp/demo"), value=5)
 
@@ -33,6 +36,7 @@ def test_log_event_appends_to_file(tmp_path, capsys, monkeypatch) -> None:
     monkeypatch.setenv("PRE_NIXOS_LOG_EVENTS", "1")
     log_path = tmp_path / "logs" / "actions.log"
     monkeypatch.setenv("PRE_NIXOS_LOG_FILE", str(log_path))
+    logging_utils.reload_config()
 
     log_event("pre_nixos.test.file", payload={"key": "value"})
 
@@ -47,3 +51,81 @@ def test_log_event_appends_to_file(tmp_path, capsys, monkeypatch) -> None:
 
     assert file_record == stderr_record
     assert file_record["event"] == "pre_nixos.test.file"
+
+
+def test_log_event_settings_read_once(tmp_path, capsys, monkeypatch) -> None:
+    monkeypatch.setenv("PRE_NIXOS_LOG_EVENTS", "1")
+    monkeypatch.setenv("PRE_NIXOS_LOG_FILE", str(tmp_path / "actions.log"))
+    logging_utils.reload_config()
+    monkeypatch.setenv("PRE_NIXOS_LOG_EVENTS", "0")
+
+    log_event("pre_nixos.test.cached")
+    assert capsys.readouterr().err.strip()
+
+    logging_utils.reload_config()
+    log_event("pre_nixos.test.disabled")
+    assert capsys.readouterr().err == ""
+
+
+def test_log_event_keeps_record_order(tmp_path, capsys, monkeypatch) -> None:
+    monkeypatch.setenv("PRE_NIXOS_LOG_EVENTS", "1")
+    monkeypatch.setenv("PRE_NIXOS_LOG_FILE", str(tmp_path / "actions.log"))
+    logging_utils.reload_config()
+
+    log_event("pre_nixos.test.order", zeta=1, alpha=2)
+
+    line = capsys.readouterr().err.strip()
+    assert line.startswith('{"timestamp":')
+    assert list(json.loads(line)) == ["timestamp", "event", "zeta", "alpha"]
+
+
+def test_log_event_reuses_log_file_descriptor(tmp_path, capsys, monkeypatch) -> None:
+    log_path = tmp_path / "logs" / "actions.log"
+    monkeypatch.setenv("PRE_NIXOS_LOG_EVENTS", "1")
+    monkeypatch.setenv("PRE_NIXOS_LOG_FILE", str(log_path))
+    logging_utils.reload_config()
+
+    opened: list[str] = []
+    real_open = logging_utils.os.open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(str(path))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(logging_utils.os, "open", counting_open)
+
+    log_event("pre_nixos.test.first")
+    log_event("pre_nixos.test.second")
+    capsys.readouterr()
+
+    assert opened == [str(log_path)]
+    events = [json.loads(line)["event"] for line in log_path.read_text().splitlines()]
+    assert events == ["pre_nixos.test.first", "pre_nixos.test.second"]
+
+
+def test_log_event_reports_log_file_failure_once(tmp_path, capsys, monkeypatch) -> None:
+    monkeypatch.setenv("PRE_NIXOS_LOG_EVENTS", "1")
+    monkeypatch.setenv("PRE_NIXOS_LOG_FILE", str(tmp_path))
+    logging_utils.reload_config()
+
+    log_event("pre_nixos.test.first")
+    log_event("pre_nixos.test.second")
+
+    lines = capsys.readouterr().err.splitlines()
+    failures = [line for line in lines if line.startswith("pre-nixos: failed to write log")]
+    assert len(failures) == 1
+    events = [json.loads(line)["event"] for line in lines if line.startswith("{")]
+    assert events == ["pre_nixos.test.first", "pre_nixos.test.second"]
+
+
+def test_serialise_handles_exact_types_and_subclasses() -> None:
+    Pair = namedtuple("Pair", "left right")
+
+    assert logging_utils._serialise(
+        {"path": Path("/tmp/x"), 1: [None, True, 2.5, ("a",)]}
+    ) == {"path": "/tmp/x", "1": [None, True, 2.5, ["a"]]}
+    assert logging_utils._serialise(OrderedDict(key=Pair(1, "b"))) == {
+        "key": [1, "b"]
+    }
+    assert logging_utils._serialise(frozenset({1})) == "frozenset({1})"
+    assert logging_utils._serialise(b"raw") == "b'raw'"
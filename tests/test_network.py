@@ -7,6 +7,8 @@ from pathlib import Path
 
 import pytest
 
+from pre_nixos import logging_utils
+from pre_nixos import network as network_module
 from pre_nixos.network import (
     LanConfiguration,
     configure_lan,
@@ -75,14 +77,14 @@ def test_identify_lan_uses_operstate_on_transient_carrier_error(tmp_path, monkey
     (other / "device").mkdir()
     (other / "carrier").write_text("0")
 
-    original_read_text = Path.read_text
+    original_read = network_module._read_sysfs_attribute
 
-    def fake_read_text(self, *args, **kwargs):
-        if self == iface / "carrier":
+    def fake_read(path):
+        if path == str(iface / "carrier"):
             raise OSError(errno.EINVAL, "Invalid argument")
-        return original_read_text(self, *args, **kwargs)
+        return original_read(path)
 
-    monkeypatch.setattr(Path, "read_text", fake_read_text)
+    monkeypatch.setattr(network_module, "_read_sysfs_attribute", fake_read)
 
     assert identify_lan(netdir) == "eth0"
 
@@ -108,16 +110,16 @@ def test_identify_lan_logs_operstate_detection(tmp_path, monkeypatch):
 
     monkeypatch.setattr("pre_nixos.network.log_event", record_event)
 
-    original_read_text = Path.read_text
+    original_read = network_module._read_sysfs_attribute
 
-    def fake_read_text(self, *args, **kwargs):
-        if self == iface / "carrier":
+    def fake_read(path):
+        if path == str(iface / "carrier"):
             error = OSError("transient carrier failure")
             error.errno = 0
             raise error
-        return original_read_text(self, *args, **kwargs)
+        return original_read(path)
 
-    monkeypatch.setattr(Path, "read_text", fake_read_text)
+    monkeypatch.setattr(network_module, "_read_sysfs_attribute", fake_read)
 
     assert identify_lan(netdir) == "eth0"
 
@@ -265,6 +267,7 @@ def test_configure_lan_emits_structured_logs(tmp_path, monkeypatch, capsys):
 
     monkeypatch.setenv("PRE_NIXOS_EXEC", "0")
     monkeypatch.setenv("PRE_NIXOS_LOG_EVENTS", "1")
+    logging_utils.reload_config()
 
     status_dir = tmp_path / "run/pre-nixos"
 
@@ -550,3 +553,78 @@ def test_wait_for_ipv4_times_out(monkeypatch):
 
     assert wait_for_ipv4(attempts=2, delay=0) is None
     assert "pre_nixos.network.wait_for_ipv4.timeout" in events
+
+
+def test_wait_for_lan_brings_up_device_backed_interfaces(tmp_path, monkeypatch):
+    netdir = tmp_path / "net"
+    (netdir / "lo").mkdir(parents=True)
+    (netdir / "lo" / "carrier").write_text("1")
+    for name, carrier in ("eth1", "1"), ("eth0", "0"):
+        iface = netdir / name
+        iface.mkdir()
+        (iface / "device").mkdir()
+        (iface / "carrier").write_text(carrier)
+
+    commands: list[list[str]] = []
+    monkeypatch.setenv("PRE_NIXOS_EXEC", "1")
+    monkeypatch.setattr(network_module, "_run", commands.append)
+
+    assert network_module.wait_for_lan(netdir, attempts=1, delay=0) == "eth1"
+    assert commands == [
+        ["ip", "link", "set", "eth0", "up"],
+        ["ip", "link", "set", "eth1", "up"],
+    ]
+
+
+def test_identify_lan_stops_after_first_link(tmp_path, monkeypatch):
+    for name, carrier in ("eth0", "1"), ("eth1", "1"), ("eth2", "0"):
+        iface = tmp_path / name
+        iface.mkdir()
+        (iface / "device").mkdir()
+        (iface / "carrier").write_text(carrier)
+
+    checked: list[str] = []
+    original_exists = network_module.os.path.exists
+
+    def recording_exists(path):
+        checked.append(str(path))
+        return original_exists(path)
+
+    monkeypatch.setattr(network_module.os.path, "exists", recording_exists)
+
+    assert identify_lan(tmp_path) == "eth0"
+    assert checked == [str(tmp_path / "eth0" / "device")]
+
+
+def test_wait_for_lan_rescans_on_link_event(tmp_path, monkeypatch):
+    import socket
+    import time
+
+    monitor, notifier = socket.socketpair()
+    notifier.send(b"RTM_NEWLINK")
+    results = iter([None, "eth0"])
+
+    monkeypatch.setenv("PRE_NIXOS_EXEC", "1")
+    monkeypatch.setattr(network_module, "_open_link_monitor", lambda: monitor)
+    monkeypatch.setattr(network_module, "_physical_interfaces", lambda _path: [])
+    monkeypatch.setattr(network_module, "identify_lan", lambda _path: next(results))
+
+    started = time.monotonic()
+    try:
+        assert network_module.wait_for_lan(tmp_path, attempts=1, delay=30) == "eth0"
+    finally:
+        notifier.close()
+    assert time.monotonic() - started < 5
+    assert monitor.fileno() == -1
+
+
+def test_wait_for_lan_sleeps_without_link_monitor(tmp_path, monkeypatch):
+    sleeps: list[float] = []
+
+    monkeypatch.setenv("PRE_NIXOS_EXEC", "0")
+    monkeypatch.setattr(network_module, "_open_link_monitor", lambda: None)
+    monkeypatch.setattr(network_module, "identify_lan", lambda _path: None)
+    monkeypatch.setattr(network_module.time, "sleep", sleeps.append)
+
+    assert network_module.wait_for_lan(tmp_path, attempts=2, delay=0.05) is None
+    assert sleeps == [0.05, 0.05]